@@ -32,8 +32,10 @@ coordinates, like polar or spherical coordinates.
 __version__ = '4.1.1'
 __author__ = 'Mikael Mortensen'
 
+import atexit as _atexit
 import numpy as np
 from mpi4py import MPI
+from mpi4py_fft import fftw as _fftw
 from .config import config, dumpconfig
 from . import chebyshev
 from . import chebyshevu
@@ -56,3 +58,11 @@ from .utilities import *
 from .utilities.lagrangian_particles import *
 from .utilities.integrators import *
 comm = MPI.COMM_WORLD
+
+if config['fftw']['wisdom']['filename'] is not None:
+    # Store FFTW wisdom across processes
+    try:
+        _fftw.import_wisdom(config['fftw']['wisdom']['filename'])
+    except AssertionError:
+        pass
+    _atexit.register(_fftw.export_wisdom, config['fftw']['wisdom']['filename'])
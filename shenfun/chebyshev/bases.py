@@ -41,6 +41,7 @@ is used to transfer any composite basis back and forth to the orthogonal basis.
 """
 from __future__ import division
 import functools
+import weakref
 import numpy as np
 from numpy.polynomial import chebyshev as n_cheb
 import sympy as sp
@@ -49,7 +50,7 @@ from mpi4py_fft import fftw
 from shenfun.spectralbase import SpectralBase, Transform, FuncWrap, \
     islicedict, slicedict, getCompositeBase, getBCGeneric, BoundaryConditions
 from shenfun.matrixbase import SparseMatrix
-from shenfun.optimization import optimizer
+from shenfun.optimization import optimizer, runtimeoptimizer
 from shenfun.config import config
 from shenfun.jacobi.recursions import half, cn
 from shenfun.jacobi import JacobiBase
@@ -83,22 +84,250 @@ chebval = optimizer(n_cheb.chebval)
 
 xp = sp.Symbol('x', real=True)
 
+# Quadrature points and weights, shared by all Chebyshev spaces
+_points_and_weights = {}
+
+@runtimeoptimizer
+def chebvanderder(V, k):
+    r"""Return k'th derivative of Chebyshev Vandermonde matrix
+
+    Uses the recurrence
+
+    .. math::
+
+        T^{(k)}_{n+1} = (n+1)\left(2T^{(k-1)}_n + \frac{T^{(k)}_{n-1}}{n-1}\right),
+
+    column by column, instead of a dense differentiation matrix.
+
+    Parameters
+    ----------
+    V : array
+        Vandermonde matrix :math:`T_j(x_i)` of shape (M, N)
+    k : int
+        Order of derivative
+    """
+    N = V.shape[1]
+    for _ in range(k):
+        W = np.zeros_like(V)
+        if N > 1:
+            W[:, 1] = V[:, 0]
+        if N > 2:
+            W[:, 2] = 4*V[:, 1]
+        for n in range(2, N-1):
+            W[:, n+1] = (n+1)*(2*V[:, n] + W[:, n-1]/(n-1))
+        V = W
+    return V
+
+@runtimeoptimizer
+def chebyshev_inverse_mass(array, axis, scale, last_scale):
+    """Apply inverse of the diagonal Chebyshev mass matrix in place
+
+    All coefficients along `axis` are multiplied by `scale`, except the
+    first, which is multiplied by `scale`/2, and the last, which is
+    multiplied by `scale`*`last_scale`.
+
+    Parameters
+    ----------
+    array : array
+        Expansion coefficients. Overwritten and returned
+    axis : int
+        The axis of the expansion
+    scale : float
+        Inverse of the mass matrix diagonal, except for the first item
+    last_scale : float
+        Additional scaling of the last item. Use 0.5 for Gauss-Lobatto
+    """
+    array *= scale
+    s = [slice(None)]*array.ndim
+    s[axis] = 0
+    array[tuple(s)] *= 0.5
+    s[axis] = -1
+    array[tuple(s)] *= last_scale
+    return array
+
+@runtimeoptimizer
+def biharmonic_to_ortho(input_array, output_array, a, b, axis):
+    r"""Compute Chebyshev coefficients of a :class:`.ShenBiharmonic` expansion
+
+    Computes
+
+    .. math::
+
+        w_k = u_k + a_{k-2} u_{k-2} + b_{k-4} u_{k-4},
+
+    along `axis`, using only the first M=len(a) coefficients of u.
+
+    Parameters
+    ----------
+    input_array : array
+        Expansion coefficients u
+    output_array : array
+        Chebyshev coefficients w. Must be different from input_array
+    a, b : arrays
+        The second and fourth diagonals of the stencil matrix, of length M
+    axis : int
+        The axis of the expansion
+    """
+    M = a.shape[0]
+    u = np.moveaxis(input_array, axis, 0)
+    w = np.moveaxis(output_array, axis, 0)
+    s = (slice(None),) + (np.newaxis,)*(u.ndim-1)
+    w.fill(0)
+    w[:M] = u[:M]
+    w[2:M+2] += a[s]*u[:M]
+    w[4:M+4] += b[s]*u[:M]
+    return output_array
+
+@runtimeoptimizer
+def biharmonic_composite(V, P, a, b):
+    r"""Compute Vandermonde matrix of :class:`.ShenBiharmonic`
+
+    Computes
+
+    .. math::
+
+        P_{ij} = V_{ij} + a_j V_{i,j+2} + b_j V_{i,j+4},
+
+    where :math:`a_j` and :math:`b_j` are taken as zero beyond their lengths.
+
+    Parameters
+    ----------
+    V : 2D array
+        Chebyshev Vandermonde matrix
+    P : 2D array
+        The composite Vandermonde matrix (output). Must be different from V
+    a, b : arrays
+        The second and fourth diagonals of the stencil matrix
+    """
+    Na, Nb = a.shape[0], b.shape[0]
+    P[:] = V
+    P[:, :Na] += a*V[:, 2:Na+2]
+    P[:, :Nb] += b*V[:, 4:Nb+4]
+    return P
+
+@runtimeoptimizer
+def biharmonic_scalar_product(array, a, b, axis):
+    r"""Compute :class:`.ShenBiharmonic` scalar product from Chebyshev one
+
+    Computes in place
+
+    .. math::
+
+        v_k = w_k + a_k w_{k+2} + b_k w_{k+4}, \quad k=0, 1, \ldots, M-1,
+
+    along `axis`, where w is the Chebyshev scalar product and M=len(a).
+    Items k >= M are left untouched.
+
+    Parameters
+    ----------
+    array : array
+        Chebyshev scalar product w. Overwritten with v and returned
+    a, b : arrays
+        Factors of length M
+    axis : int
+        The axis of the scalar product
+    """
+    M = a.shape[0]
+    w = np.moveaxis(array, axis, 0)
+    s = (slice(None),) + (np.newaxis,)*(w.ndim-1)
+    # The right hand side is evaluated before w[:M] is modified
+    w[:M] += a[s]*w[2:M+2] + b[s]*w[4:M+4]
+    return array
+
 class DCTWrap(FuncWrap):
     """DCT for complex input"""
 
     @property
     def dct(self):
-        return object.__getattribute__(self, '_func')
+        return self._func
 
     def __call__(self, **kw):
-        dct_obj = self.dct
-        dct_obj.input_array[...] = self.input_array.real
+        dct_obj = self._func
+        dct_obj.input_array[...] = self._input_array.real
         dct_obj(None, None, **kw)
-        self.output_array.real[...] = dct_obj.output_array
-        dct_obj.input_array[...] = self.input_array.imag
+        self._output_array.real[...] = dct_obj.output_array
+        dct_obj.input_array[...] = self._input_array.imag
         dct_obj(None, None, **kw)
-        self.output_array.imag[...] = dct_obj.output_array
-        return self.output_array
+        self._output_array.imag[...] = dct_obj.output_array
+        return self._output_array
+
+class PlannedDCTWrap(FuncWrap):
+    """Planned DCT applied to given work arrays
+
+    The planned dct may be shared by several spaces (see :func:`get_planned_dct`)
+    and is always executed on the input and output arrays of this wrapper.
+    Complex arrays are transformed through real views, with the real and
+    imaginary parts interleaved along an additional last axis of length 2.
+    Both parts are then transformed by one execution of the plan, without
+    copying.
+    """
+
+    def __init__(self, func, input_array, output_array):
+        FuncWrap.__init__(self, func, input_array, output_array)
+        self._real_input_array = real_view(input_array)
+        self._real_output_array = real_view(output_array)
+        # The plan is executed on its own planned arrays if these are the
+        # arrays of this wrapper, which avoids the checks of a new-array
+        # execute
+        if (same_array(func.input_array, self._real_input_array) and
+                same_array(func.output_array, self._real_output_array)):
+            self._args = ()
+        else:
+            self._args = (self._real_input_array, self._real_output_array)
+
+    def __call__(self, **kw):
+        self._func(*self._args, **kw)
+        return self._output_array
+
+def same_array(a, b):
+    """Return whether arrays `a` and `b` have the same memory layout and data"""
+    return (a.__array_interface__['data'][0] == b.__array_interface__['data'][0]
+            and a.shape == b.shape and a.strides == b.strides and a.dtype == b.dtype)
+
+def real_view(a):
+    """Return real view of array `a`
+
+    A complex array of shape s is viewed as a real array of shape s+(2,),
+    with the real and imaginary parts along the last axis. Real arrays are
+    returned as is.
+    """
+    if a.dtype.kind == 'c':
+        return a.view(a.real.dtype).reshape(a.shape+(2,))
+    return a
+
+# Planned dcts (and dsts), shared by all Chebyshev (and ChebyshevU) spaces
+# in the process. Only weak references to the latest wrappers are held, such
+# that a plan, and the work arrays it was planned with, are freed together
+# with the last space using it
+_dct_plans = weakref.WeakValueDictionary()
+
+def get_planned_dct(plan, key, input_array, output_array, **kw):
+    """Return planned dct applied to given work arrays
+
+    The plan is shared with any live space that has previously been planned
+    with the same key, or else created.
+
+    Parameters
+    ----------
+    plan : Python function
+        The planner, e.g., :func:`mpi4py_fft.fftw.dctn`
+    key : tuple
+        Unique key for the plan
+    input_array, output_array : arrays
+        Work arrays of the returned :class:`.PlannedDCTWrap`. These arrays
+        are not modified if the plan is shared, but may be overwritten during
+        planning.
+    kw : dict
+        Keyword arguments to plan
+    """
+    wrapped = _dct_plans.get(key)
+    if wrapped is None:
+        func = plan(real_view(input_array), output_array=real_view(output_array), **kw)
+    else:
+        func = wrapped.func
+    wrapped = PlannedDCTWrap(func, input_array, output_array)
+    _dct_plans[key] = wrapped
+    return wrapped
 
 
 class Orthogonal(JacobiBase):
@@ -152,16 +381,38 @@ class Orthogonal(JacobiBase):
             self._xfftn_fwd.opts = self._xfftn_bck.opts = config['fftw']['dct']
         self.plan((int(padding_factor*N),), 0, dtype, {})
 
-    # Comment due to curvilinear issues
-    #def apply_inverse_mass(self, array):
-    #    coors = self.tensorproductspace.coors if self.dimensions > 1 else self.coors
-    #    if not coors.hi.prod() == 1:
-    #        return JacobiBase.apply_inverse_mass(self, array)
-    #    array *= (2/np.pi*self.domain_factor())
-    #    array[self.si[0]] /= 2
-    #    if self.quad == 'GL':
-    #        array[self.si[-1]] /= 2
-    #    return array
+    def _has_diagonal_mass(self):
+        return self._diagonal_mass
+
+    def apply_inverse_mass(self, array):
+        if not self._has_diagonal_mass():
+            # mass matrix may not be diagonal, or there is scaling
+            return JacobiBase.apply_inverse_mass(self, array)
+        if array.ndim != self._inverse_mass.ndim:
+            last_scale = 0.5 if self.quad == 'GL' else 1
+            return chebyshev_inverse_mass(array, self.axis, 2/np.pi*float(self.domain_factor()), last_scale)
+        array *= self._inverse_mass
+        return array
+
+    def forward(self, input_array=None, output_array=None, kind=None):
+        kind = kind if kind is not None else config['transforms']['kind'][self.family()]
+        if kind != 'fast' or self.bc or not self._has_diagonal_mass():
+            return SpectralBase.forward(self, input_array, output_array, kind=kind)
+
+        if self.quad not in ('GC', 'GL'):
+            return SpectralBase.forward(self, input_array, output_array, kind=kind)
+
+        # Scale the dct output and apply the inverse mass matrix in one pass
+        if input_array is not None:
+            self.forward.input_array[...] = input_array
+        self.forward._input_array = self.get_measured_array(self.forward._input_array)
+        out = self.forward.output_array
+        self._truncation_forward(self.forward.xfftn(), out)
+        out *= self._forward_inverse_mass
+        if output_array is not None:
+            output_array[...] = out
+            return output_array
+        return out
 
     @staticmethod
     def family():
@@ -170,18 +421,27 @@ class Orthogonal(JacobiBase):
     def points_and_weights(self, N=None, map_true_domain=False, weighted=True, **kw):
         if N is None:
             N = self.shape(False)
+        key = (self.quad, N, weighted)
+        if key not in _points_and_weights:
+            _points_and_weights[key] = self._compute_points_and_weights(N, weighted)
+        points, weights = (a.copy() for a in _points_and_weights[key])
+
+        if map_true_domain is True:
+            points = self.map_true_domain(points)
+
+        return points, weights
 
+    def _compute_points_and_weights(self, N, weighted):
         if weighted:
             if self.quad == "GL":
-                points = -(n_cheb.chebpts2(N)).astype(float)
+                points = np.cos(np.arange(N)*np.pi/(N-1))
                 weights = np.full(N, np.pi/(N-1))
                 weights[0] /= 2
                 weights[-1] /= 2
 
             elif self.quad == "GC":
-                points, weights = n_cheb.chebgauss(N)
-                points = points.astype(float)
-                weights = weights.astype(float)
+                points = np.cos((np.arange(N)+0.5)*np.pi/N)
+                weights = np.full(N, np.pi/N)
 
             elif self.quad == "GU":
                 points = np.cos((np.arange(N)+1)*np.pi/(N+1))
@@ -200,7 +460,7 @@ class Orthogonal(JacobiBase):
                 weights[-1] *= 0.5
 
             elif self.quad == "GC":
-                points = n_cheb.chebgauss(N)[0]
+                points = np.cos((np.arange(N)+0.5)*np.pi/N)
                 d = fftw.aligned(N, fill=0)
                 k = 2*(1 + np.arange((N-1)//2))
                 d[::2] = (2./N)/np.hstack((1., 1.-k*k))
@@ -218,10 +478,6 @@ class Orthogonal(JacobiBase):
                 dst = fftw.dstn(w, axes=(0,), type=1)
                 weights = dst(d, w)
                 weights *= (np.sin(theta))/(N+1)
-
-        if map_true_domain is True:
-            points = self.map_true_domain(points)
-
         return points, weights
 
     def vandermonde(self, x):
@@ -273,11 +529,8 @@ class Orthogonal(JacobiBase):
         if x is None:
             x = self.mesh(False, False)
         V = self.vandermonde(x)
-        M = V.shape[1]
         if k > 0:
-            D = np.zeros((M, M))
-            D[:-k] = n_cheb.chebder(np.eye(M, M), k)
-            V = np.dot(V, D)
+            V = chebvanderder(V, k)
         return V
 
     def _evaluate_expansion_all(self, input_array, output_array, x=None, kind='fast'):
@@ -289,19 +542,13 @@ class Orthogonal(JacobiBase):
         assert output_array is self.backward.output_array
         output_array = self.backward.xfftn()
 
-        if self.quad == "GC":
-            s0 = self.sl[slice(0, 1)]
-            output_array *= 0.5
-            output_array += input_array[s0]/2
-
-        elif self.quad == "GL":
-            output_array *= 0.5
-            output_array += input_array[self.sl[slice(0, 1)]]/2
-            s0 = self.sl[slice(-1, None)]
-            s2 = self.sl[slice(0, None, 2)]
-            output_array[s2] += input_array[s0]/2
-            s2 = self.sl[slice(1, None, 2)]
-            output_array[s2] -= input_array[s0]/2
+        sl = self._sl_cache
+        output_array += input_array[sl['first']]
+        if self.quad == "GL":
+            s0 = sl['last']
+            output_array[sl['even']] += input_array[s0]
+            output_array[sl['odd']] -= input_array[s0]
+        output_array *= 0.5
 
     def _evaluate_scalar_product(self, kind='fast'):
         if kind != 'fast':
@@ -319,8 +566,7 @@ class Orthogonal(JacobiBase):
     def eval(self, x, u, output_array=None):
         x = np.atleast_1d(x)
         x = self.map_reference_domain(x)
-        #oa = chebval(x, u)
-        oa = n_cheb.chebval(x, u, False)
+        oa = chebval(x, u)
         if output_array is not None:
             output_array[:] = oa
             return output_array
@@ -365,6 +611,12 @@ class Orthogonal(JacobiBase):
         return self._bc_space
 
     def plan(self, shape, axis, dtype, options):
+        # Whether the mass matrix is diagonal, with no scaling. Set here,
+        # since plan is called whenever the space is linked to a new
+        # TensorProductSpace, and the coordinates may then change
+        coors = self.tensorproductspace.coors if self.tensorproductspace else self.coors
+        self._diagonal_mass = self.is_orthogonal and coors.is_cartesian
+
         if shape in (0, (0,)):
             return
 
@@ -387,23 +639,16 @@ class Orthogonal(JacobiBase):
                  fftw.flag_dict[opts['overwrite_input']])
         threads = opts['threads']
 
-        U = fftw.aligned(shape, dtype=float)
-
-        xfftn_fwd = plan_fwd(U, axes=(axis,), threads=threads, flags=flags)
-        V = xfftn_fwd.output_array
-        xfftn_bck = plan_bck(V, axes=(axis,), threads=threads, flags=flags, output_array=U)
+        dtype = complex if np.dtype(dtype) is np.dtype('complex') else float
+        U = fftw.aligned(shape, dtype=dtype)
+        V = fftw.aligned(shape, dtype=dtype)
+        key = ('dct', tuple(shape), np.dtype(dtype).char, axis, self.quad, threads, flags)
+        kw = dict(axes=(axis,), threads=threads, flags=flags)
+        xfftn_fwd = get_planned_dct(plan_fwd, key+('fwd',), U, V, **kw)
+        xfftn_bck = get_planned_dct(plan_bck, key+('bck',), V, U, **kw)
         V.fill(0)
         U.fill(0)
 
-        if np.dtype(dtype) is np.dtype('complex'):
-            # dct only works on real data, so need to wrap it
-            U = fftw.aligned(shape, dtype=complex)
-            V = fftw.aligned(shape, dtype=complex)
-            U.fill(0)
-            V.fill(0)
-            xfftn_fwd = DCTWrap(xfftn_fwd, U, V)
-            xfftn_bck = DCTWrap(xfftn_bck, V, U)
-
         self.axis = axis
         if self.padding_factor != 1:
             trunc_array = self._get_truncarray(shape, V.dtype)
@@ -417,6 +662,23 @@ class Orthogonal(JacobiBase):
 
         self.si = islicedict(axis=self.axis, dimensions=U.ndim)
         self.sl = slicedict(axis=self.axis, dimensions=U.ndim)
+        self._sl_cache = {'first': self.sl[slice(0, 1)],
+                          'last': self.sl[slice(-1, None)],
+                          'even': self.sl[slice(0, None, 2)],
+                          'odd': self.sl[slice(1, None, 2)]}
+
+        if self.is_orthogonal:
+            # Diagonal of the inverse mass matrix, and the same including the
+            # scaling of the forward dct, shaped for broadcasting along axis
+            d = np.ones(self.N)
+            d[0] = 0.5
+            d[-1] *= 0.5 if self.quad == 'GL' else 1
+            d = d.reshape([self.N if i == axis else 1 for i in range(U.ndim)])
+            self._inverse_mass = d*(2/np.pi*float(self.domain_factor()))
+            if self.quad == 'GL':
+                self._forward_inverse_mass = d/(self.N*self.padding_factor-1)
+            else:
+                self._forward_inverse_mass = d/(self.N*self.padding_factor)
 
 # Note that all composite spaces rely on the fast transforms of
 # the orthogonal space. For this reason we have an intermediate
@@ -487,6 +749,14 @@ class ShenDirichlet(CompositeBase):
     def short_name():
         return 'SD'
 
+    def _composite(self, V, argument=0):
+        P = np.empty_like(V)
+        np.subtract(V[:, :-2], V[:, 2:], out=P[:, :-2])
+        P[:, -2:] = V[:, -2:]
+        if argument == 1: # if trial function
+            P[:, slice(-(self.N-self.dim()), None)] = self.get_bc_space()._composite(V)
+        return P
+
     #def _evaluate_scalar_product(self, kind='fast'):
     #    if kind != 'fast':
     #        SpectralBase._evaluate_scalar_product(self, kind=kind)
@@ -716,6 +986,7 @@ class ShenNeumann(CompositeBase):
                                padding_factor=padding_factor, dealias_direct=dealias_direct,
                                coordinates=coordinates)
         self._stencil = {0: 1, 2: -(n/(n+2))**2}
+        self._factors = {}
 
     @staticmethod
     def boundary_condition():
@@ -725,6 +996,27 @@ class ShenNeumann(CompositeBase):
     def short_name():
         return 'SN'
 
+    def set_factor_array(self, v):
+        """Set intermediate factor array for the scalar product of `v`"""
+        key = (v.shape, self.axis)
+        f = self._factors.get(key)
+        if f is None:
+            k = np.arange(self.dim(), dtype=float)
+            f = -(k/(k+2))**2
+            f = f.reshape([1]*self.axis + [-1] + [1]*(v.ndim-self.axis-1))
+            self._factors[key] = f
+        self._factor = f
+
+    def _evaluate_scalar_product(self, kind='fast'):
+        if kind != 'fast':
+            CompositeBase._evaluate_scalar_product(self, kind=kind)
+            return
+        Orthogonal._evaluate_scalar_product(self, kind=kind)
+        output = self.scalar_product.tmp_array
+        M = self.dim()
+        self.set_factor_array(output)
+        output[self.sl[slice(0, M)]] += self._factor*output[self.sl[slice(2, M+2)]]
+
 
 class CombinedShenNeumann(CompositeBase):
     r"""Function space for Neumann boundary conditions
@@ -962,6 +1254,11 @@ class ShenBiharmonic(CompositeBase):
                                padding_factor=padding_factor, dealias_direct=dealias_direct,
                                coordinates=coordinates)
         self._stencil = {0: 1, 2: -(2*n + 4)/(n + 3), 4: (n + 1)/(n + 3)}
+        # Second and fourth stencil diagonals, used by the scalar product
+        # and to_ortho
+        k = np.arange(self.dim(), dtype=float)
+        self._factor1 = -(2*k+4)/(k+3)
+        self._factor2 = (k+1)/(k+3)
 
     @staticmethod
     def boundary_condition():
@@ -971,6 +1268,39 @@ class ShenBiharmonic(CompositeBase):
     def short_name():
         return 'SB'
 
+    def _evaluate_scalar_product(self, kind='fast'):
+        if kind != 'fast':
+            CompositeBase._evaluate_scalar_product(self, kind=kind)
+            return
+        Orthogonal._evaluate_scalar_product(self, kind=kind)
+        output = self.scalar_product.tmp_array
+        if config['optimization']['mode'].lower() == 'numba':
+            biharmonic_scalar_product(output, self._factor1, self._factor2, self.axis)
+        else:
+            # Avoid dispatch of runtimeoptimizer when there is no kernel
+            biharmonic_scalar_product.func(output, self._factor1, self._factor2, self.axis)
+
+    def _composite(self, V, argument=0):
+        P = np.empty_like(V)
+        K = self.stencil_matrix(V.shape[1])
+        biharmonic_composite(V, P, K[2], K[4])
+        if argument == 1: # if trial function
+            P[:, slice(-(self.N-self.dim()), None)] = self.get_bc_space()._composite(V)
+        return P
+
+    def to_ortho(self, input_array, output_array=None):
+        if config['optimization']['mode'].lower() != 'numba':
+            # The cached slices of the generic method are faster than numpy
+            # version of biharmonic_to_ortho
+            return CompositeBase.to_ortho(self, input_array, output_array)
+        if output_array is None:
+            output_array = np.empty_like(input_array)
+        output_array = biharmonic_to_ortho(input_array, output_array, self._factor1,
+                                           self._factor2, self.axis)
+        if self.has_nonhomogeneous_bcs:
+            self.bc._add_to_orthogonal(output_array, input_array)
+        return output_array
+
 class PolarDirichlet(CompositeBase):
     r"""Function space for polar coordinates.
 
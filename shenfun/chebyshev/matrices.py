@@ -64,6 +64,7 @@ from __future__ import division
 import numpy as np
 import scipy
 from shenfun.optimization import cython, numba
+from shenfun.config import config
 from shenfun.matrixbase import SpectralMatrix, SpectralMatDict
 from shenfun.spectralbase import get_norm_sq
 from shenfun.la import TDMA as generic_TDMA
@@ -860,7 +861,7 @@ class CTTmat(SpectralMatrix):
     """
     def __init__(self, test, trial, scale=1, measure=1, assemble=None, kind=None, fixed_resolution=None):
         SpectralMatrix.__init__(self, test, trial, scale=scale, measure=measure, assemble=assemble, kind=kind, fixed_resolution=fixed_resolution)
-        self._matvec_methods += ['cython']
+        self._matvec_methods += ['cython', 'numba']
 
     def assemble(self, method):
         test, trial = self.testfunction, self.trialfunction
@@ -875,11 +876,15 @@ class CTTmat(SpectralMatrix):
         return d
 
     def matvec(self, v, c, format=None, axis=0):
-        format = 'cython' if format is None else format
+        if format is None:
+            format = 'numba' if config['optimization']['mode'].lower() == 'numba' else 'cython'
         c.fill(0)
         if format == 'cython':
             cython.Matvec.CTT_matvec(v, c, axis)
             self.scale_array(c, self.scale*self._keyscale)
+        elif format == 'numba':
+            numba.chebyshev.CTT_matvec(v, c, axis)
+            self.scale_array(c, self.scale*self._keyscale)
         else:
             format = None if format in self._matvec_methods else format
             c = super(CTTmat, self).matvec(v, c, format=format, axis=axis)
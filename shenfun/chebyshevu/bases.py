@@ -8,10 +8,11 @@ from numpy.polynomial import chebyshev as n_cheb
 import sympy as sp
 from scipy.special import eval_chebyu
 from mpi4py_fft import fftw
-from shenfun.spectralbase import SpectralBase, Transform, FuncWrap, \
+from shenfun.spectralbase import SpectralBase, Transform, \
     islicedict, slicedict, getCompositeBase, getBCGeneric, BoundaryConditions
 from shenfun.matrixbase import SparseMatrix
 from shenfun.config import config
+from shenfun.chebyshev.bases import get_planned_dct
 from shenfun.jacobi.recursions import half, un, n
 from shenfun.jacobi import JacobiBase
 
@@ -32,31 +33,6 @@ __all__ = bases + bcbases + testbases
 
 xp = sp.Symbol('x', real=True)
 
-class DCTWrap(FuncWrap):
-    """DCT for complex input"""
-
-    @property
-    def dct(self):
-        return object.__getattribute__(self, '_func')
-
-    def __call__(self, input_array=None, output_array=None, **kw):
-        dct_obj = self.dct
-
-        if input_array is not None:
-            self.input_array[...] = input_array
-
-        dct_obj.input_array[...] = self.input_array.real
-        dct_obj(None, None, **kw)
-        self.output_array.real[...] = dct_obj.output_array
-        dct_obj.input_array[...] = self.input_array.imag
-        dct_obj(None, None, **kw)
-        self.output_array.imag[...] = dct_obj.output_array
-
-        if output_array is not None:
-            output_array[...] = self.output_array
-            return output_array
-        return self.output_array
-
 class Orthogonal(JacobiBase):
     r"""Function space for Chebyshev series of second kind
 
@@ -315,23 +291,16 @@ class Orthogonal(JacobiBase):
                  fftw.flag_dict[opts['overwrite_input']])
         threads = opts['threads']
 
-        U = fftw.aligned(shape, dtype=float)
-
-        xfftn_fwd = plan_fwd(U, axes=(axis,), threads=threads, flags=flags)
-        V = xfftn_fwd.output_array
-        xfftn_bck = plan_bck(V, axes=(axis,), threads=threads, flags=flags, output_array=U)
+        dtype = complex if np.dtype(dtype) is np.dtype('complex') else float
+        U = fftw.aligned(shape, dtype=dtype)
+        V = fftw.aligned(shape, dtype=dtype)
+        key = ('dst', tuple(shape), np.dtype(dtype).char, axis, self.quad, threads, flags)
+        kw = dict(axes=(axis,), threads=threads, flags=flags)
+        xfftn_fwd = get_planned_dct(plan_fwd, key+('fwd',), U, V, **kw)
+        xfftn_bck = get_planned_dct(plan_bck, key+('bck',), V, U, **kw)
         V.fill(0)
         U.fill(0)
 
-        if np.dtype(dtype) is np.dtype('complex'):
-            # dct only works on real data, so need to wrap it
-            U = fftw.aligned(shape, dtype=complex)
-            V = fftw.aligned(shape, dtype=complex)
-            U.fill(0)
-            V.fill(0)
-            xfftn_fwd = DCTWrap(xfftn_fwd, U, V)
-            xfftn_bck = DCTWrap(xfftn_bck, V, U)
-
         self.axis = axis
         if self.padding_factor != 1:
             trunc_array = self._get_truncarray(shape, V.dtype)
@@ -1,4 +1,5 @@
 import os
+import warnings
 from collections.abc import Mapping
 import yaml
 
@@ -6,6 +7,27 @@ import yaml
 # in '~/.shenfun/shenfun.yaml'. A yaml file to work with can be created
 # using the `dumpconfig` function below
 
+def _get_fftw_threads():
+    """Return default number of threads for all FFTW transforms
+
+    Read from the environment variable SHENFUN_FFTW_THREADS, which must be
+    a positive integer. Use 1 if not set or invalid.
+    """
+    value = os.environ.get('SHENFUN_FFTW_THREADS', '').strip()
+    if value == '':
+        return 1
+    try:
+        threads = int(value)
+    except ValueError:
+        threads = 0
+    if threads < 1:
+        warnings.warn("Invalid SHENFUN_FFTW_THREADS=%r, expected a positive "
+                      "integer. Using 1 thread." % value)
+        return 1
+    return threads
+
+fftw_threads = _get_fftw_threads()
+
 config = {
     'optimization':
     {
@@ -56,38 +78,43 @@ config = {
     {
         'dct':
         {
-            'threads': 1,
+            'threads': fftw_threads,
             'planner_effort': 'FFTW_MEASURE',
         },
         'dst':
         {
-            'threads': 1,
+            'threads': fftw_threads,
             'planner_effort': 'FFTW_MEASURE',
         },
         'rfft':
         {
-            'threads': 1,
+            'threads': fftw_threads,
             'planner_effort': 'FFTW_MEASURE'
         },
         'irfft':
         {
-            'threads': 1,
+            'threads': fftw_threads,
             'planner_effort': 'FFTW_MEASURE'
         },
         'fft':
         {
-            'threads': 1,
+            'threads': fftw_threads,
             'planner_effort': 'FFTW_MEASURE'
         },
         'ifft':
         {
-            'threads': 1,
+            'threads': fftw_threads,
             'planner_effort': 'FFTW_MEASURE'
         },
         'dlt':
         {
-            'threads': 1,
+            'threads': fftw_threads,
             'planner_effort': 'FFTW_MEASURE'
+        },
+        'wisdom':
+        {
+            # Import and export FFTW wisdom from/to this file if not None
+            'filename': None
         }
     }
 }
@@ -38,6 +38,7 @@ to the orthogonal basis.
 """
 
 from __future__ import division
+import weakref
 import sympy as sp
 import numpy as np
 from numpy.polynomial import legendre as leg
@@ -281,22 +282,31 @@ class Orthogonal(JacobiBase):
         flags = (fftw.flag_dict[opts['planner_effort']],
                  fftw.flag_dict[opts['overwrite_input']])
         threads = opts['threads']
-        U = fftw.aligned(shape, dtype=float)
-        xfftn_fwd = DLT(U, axes=(axis,), kind='scalar product', threads=threads, flags=flags)
-        V = xfftn_fwd.output_array
-        xfftn_bck = DLT(V, axes=(axis,), kind='backward', threads=threads, flags=flags, output_array=U)
-        V.fill(0)
-        U.fill(0)
+        iscomplex = np.dtype(dtype) is np.dtype('complex')
+        key = (tuple(np.atleast_1d(shape)), axis, threads, flags)
+        fwd = _dlt_plans.get(key+('fwd',)) if iscomplex else None
+        bck = _dlt_plans.get(key+('bck',)) if iscomplex else None
+        if fwd is not None and bck is not None:
+            xfftn_fwd, xfftn_bck = fwd.func, bck.func
+        else:
+            U = fftw.aligned(shape, dtype=float)
+            xfftn_fwd = DLT(U, axes=(axis,), kind='scalar product', threads=threads, flags=flags)
+            V = xfftn_fwd.output_array
+            xfftn_bck = DLT(V, axes=(axis,), kind='backward', threads=threads, flags=flags, output_array=U)
+            V.fill(0)
+            U.fill(0)
         self._leg2cheb = xfftn_fwd.leg2chebclass
 
-        if np.dtype(dtype) is np.dtype('complex'):
-            # dct only works on real data, so need to wrap it
-            U = fftw.aligned(shape, dtype=complex)
-            V = fftw.aligned(shape, dtype=complex)
-            U.fill(0)
-            V.fill(0)
+        if iscomplex:
+            # dct only works on real data, so need to wrap it. The real
+            # arrays of the wrapped plans are then only used as work arrays,
+            # and the plans are shared by all complex spaces of same shape
+            U = fftw.aligned(shape, dtype=complex, fill=0)
+            V = fftw.aligned(shape, dtype=complex, fill=0)
             xfftn_fwd = DCTWrap(xfftn_fwd, U, V)
             xfftn_bck = DCTWrap(xfftn_bck, V, U)
+            _dlt_plans[key+('fwd',)] = xfftn_fwd
+            _dlt_plans[key+('bck',)] = xfftn_bck
 
         self.axis = axis
         if self.padding_factor != 1:
@@ -313,6 +323,11 @@ class Orthogonal(JacobiBase):
         self.sl = slicedict(axis=self.axis, dimensions=U.ndim)
 
 
+# Real DLTs wrapped for complex data, shared by all complex Legendre spaces
+# in the process. Only weak references to the latest wrappers are held, such
+# that the DLTs are freed together with the last space using them
+_dlt_plans = weakref.WeakValueDictionary()
+
 CompositeBase = getCompositeBase(Orthogonal)
 BCGeneric = getBCGeneric(CompositeBase)
 
@@ -15,7 +15,8 @@ cpdef np.ndarray chebval(np.ndarray x, np.ndarray c):
         c = c.astype(np.double)
     if isinstance(x, (tuple, list)):
         x = np.asarray(x)
-    x = x.astype(float)
+    shape = np.shape(x)
+    x = np.ascontiguousarray(x, dtype=float).ravel()
     y = np.zeros_like(x, dtype=c.dtype)
     if c.dtype.char in 'fdg':
         _chebval[double](<double *>np.PyArray_DATA(x),
@@ -30,38 +31,29 @@ cpdef np.ndarray chebval(np.ndarray x, np.ndarray c):
                  c.shape[0],
                  x.shape[0])
 
-    return y
+    return y.reshape(shape)
 
 cdef void _chebval(double* x, T* c, T* y, int N, int M):
+    # Clenshaw recurrence over blocks of 8 points, reading each c[i] once
+    # per block
     cdef:
-        int i, j
-        T* c0 = <T*>calloc(M, sizeof(T))
-        T* c1 = <T*>calloc(M, sizeof(T))
-        T* tmp = <T*>calloc(M, sizeof(T))
-        double* x2 = <double*>calloc(M, sizeof(double))
+        int i, j0, l, nb
+        double x2[8]
+        T b1[8]
+        T b2[8]
+        T b0, ci
 
-    if N == 1:
-        for j in range(M):
-            c0[j] = c[0]
-            c1[j] = 0
-    elif N == 2:
-        for j in range(M):
-            c0[j] = c[0]
-            c1[j] = c[1]
-    else:
-        for j in range(M):
-            x2[j] = 2*x[j]
-            c0[j] = c[N-2]
-            c1[j] = c[N-1]
-        for i in range(3, N + 1):
-            for j in range(M):
-                tmp[j] = c0[j]
-                c0[j] = c[N-i] - c1[j]
-                c1[j] = tmp[j] + c1[j]*x2[j]
-    for j in range(M):
-        y[j] = c0[j] + x[j]*c1[j]
-
-    free(c0)
-    free(c1)
-    free(tmp)
-    free(x2)
\ No newline at end of file
+    for j0 in range(0, M, 8):
+        nb = min(8, M-j0)
+        for l in range(nb):
+            x2[l] = 2*x[j0+l]
+            b1[l] = 0
+            b2[l] = 0
+        for i in range(N-1, 0, -1):
+            ci = c[i]
+            for l in range(nb):
+                b0 = ci + x2[l]*b1[l] - b2[l]
+                b2[l] = b1[l]
+                b1[l] = b0
+        for l in range(nb):
+            y[j0+l] = c[0] + x[j0+l]*b1[l] - b2[l]
@@ -1,7 +1,9 @@
 import numpy as np
 from numba import jit
 
-__all__ = ['chebval']
+__all__ = ['chebval', 'chebvanderder', 'biharmonic_to_ortho',
+           'chebyshev_inverse_mass', 'CTT_matvec',
+           'biharmonic_composite', 'biharmonic_scalar_product']
 
 def chebval(x, c):
     c = np.array(c, ndmin=1, copy=True)
@@ -11,34 +13,313 @@ def chebval(x, c):
         x = float(x)
     if isinstance(x, (tuple, list)):
         x = np.asarray(x)
+    shape = np.shape(x)
+    x = np.ascontiguousarray(x, dtype=float).ravel()
     y = np.zeros_like(x, dtype=c.dtype)
-    c0 = np.zeros_like(x, dtype=c.dtype)
-    c1 = np.zeros_like(x, dtype=c.dtype)
-    tmp = np.zeros_like(x, dtype=c.dtype)
-    x2 = np.zeros_like(x)
-    y = _chebval(x, c, y, c0, c1, tmp, x2)
-    return y
+    y = _chebval(x, c, y)
+    return y.reshape(shape)
 
-@jit
-def _chebval(x, c, y, c0, c1, tmp, x2):
+@jit(nopython=True, fastmath=True, cache=True)
+def _chebval(x, c, y):
+    # Clenshaw recurrence over blocks of B points, reading each c[i] once
+    # per block
     N = c.shape[0]
     M = x.shape[0]
-    if N == 1:
-        c0[:] = c[0]
-        c1[:] = 0
-    elif N == 2:
-        c0[:] = c[0]
-        c1[:] = c[1]
-    else:
-        for j in range(M):
-            x2[j] = 2*x[j]
-            c0[j] = c[-2]
-            c1[j] = c[-1]
-        for i in range(3, N + 1):
-            for j in range(M):
-                tmp[j] = c0[j]
-                c0[j] = c[-i] - c1[j]
-                c1[j] = tmp[j] + c1[j]*x2[j]
-    for j in range(M):
-        y[j] = c0[j] + x[j]*c1[j]
+    B = 8
+    b1 = np.zeros(B, dtype=y.dtype)
+    b2 = np.zeros(B, dtype=y.dtype)
+    x2 = np.zeros(B)
+    for j0 in range(0, M, B):
+        nb = min(B, M-j0)
+        for l in range(nb):
+            x2[l] = 2*x[j0+l]
+            b1[l] = 0
+            b2[l] = 0
+        for i in range(N-1, 0, -1):
+            ci = c[i]
+            for l in range(nb):
+                b0 = ci + x2[l]*b1[l] - b2[l]
+                b2[l] = b1[l]
+                b1[l] = b0
+        for l in range(nb):
+            y[j0+l] = c[0] + x[j0+l]*b1[l] - b2[l]
     return y
+
+def chebvanderder(V, k):
+    for _ in range(k):
+        W = np.zeros_like(V)
+        _chebvanderder(V, W)
+        V = W
+    return V
+
+@jit(nopython=True, fastmath=True, cache=True)
+def _chebvanderder(V, W):
+    M, N = V.shape
+    for i in range(M):
+        if N > 1:
+            W[i, 1] = V[i, 0]
+        if N > 2:
+            W[i, 2] = 4*V[i, 1]
+        for n in range(2, N-1):
+            W[i, n+1] = (n+1)*(2*V[i, n] + W[i, n-1]/(n-1))
+
+def biharmonic_to_ortho(input_array, output_array, a, b, axis):
+    n = input_array.ndim
+    if n == 1:
+        _biharmonic_to_ortho_1D(input_array, output_array, a, b)
+    elif n == 2:
+        _biharmonic_to_ortho_2D(input_array, output_array, a, b, axis)
+    elif n == 3:
+        _biharmonic_to_ortho_3D(input_array, output_array, a, b, axis)
+    else:
+        # Loop over the first axis that is not the expansion axis
+        j = 1 if axis == 0 else 0
+        sl = [slice(None)]*n
+        for i in range(input_array.shape[j]):
+            sl[j] = i
+            biharmonic_to_ortho(input_array[tuple(sl)], output_array[tuple(sl)],
+                                a, b, axis-1 if axis > j else axis)
+    return output_array
+
+@jit(nopython=True, fastmath=True, cache=True)
+def _biharmonic_coefficients(k, M, a, b):
+    c0 = 1.0 if k < M else 0.0
+    c2 = a[k-2] if 2 <= k < M+2 else 0.0
+    c4 = b[k-4] if 4 <= k < M+4 else 0.0
+    return c0, c2, c4
+
+@jit(nopython=True, fastmath=True, cache=True)
+def _biharmonic_to_ortho_1D(u, w, a, b):
+    M = a.shape[0]
+    for k in range(u.shape[0]):
+        c0, c2, c4 = _biharmonic_coefficients(k, M, a, b)
+        w[k] = c0*u[k] + c2*u[max(k-2, 0)] + c4*u[max(k-4, 0)]
+
+@jit(nopython=True, fastmath=True, cache=True)
+def _biharmonic_to_ortho_2D(u, w, a, b, axis):
+    M = a.shape[0]
+    if axis == 0:
+        for k in range(u.shape[0]):
+            c0, c2, c4 = _biharmonic_coefficients(k, M, a, b)
+            k2 = max(k-2, 0)
+            k4 = max(k-4, 0)
+            for j in range(u.shape[1]):
+                w[k, j] = c0*u[k, j] + c2*u[k2, j] + c4*u[k4, j]
+    elif axis == 1:
+        for i in range(u.shape[0]):
+            _biharmonic_to_ortho_1D(u[i], w[i], a, b)
+
+@jit(nopython=True, fastmath=True, cache=True)
+def _biharmonic_to_ortho_3D(u, w, a, b, axis):
+    M = a.shape[0]
+    if axis == 0:
+        for k in range(u.shape[0]):
+            c0, c2, c4 = _biharmonic_coefficients(k, M, a, b)
+            k2 = max(k-2, 0)
+            k4 = max(k-4, 0)
+            for j in range(u.shape[1]):
+                for l in range(u.shape[2]):
+                    w[k, j, l] = c0*u[k, j, l] + c2*u[k2, j, l] + c4*u[k4, j, l]
+    elif axis == 1:
+        for i in range(u.shape[0]):
+            for k in range(u.shape[1]):
+                c0, c2, c4 = _biharmonic_coefficients(k, M, a, b)
+                k2 = max(k-2, 0)
+                k4 = max(k-4, 0)
+                for l in range(u.shape[2]):
+                    w[i, k, l] = c0*u[i, k, l] + c2*u[i, k2, l] + c4*u[i, k4, l]
+    elif axis == 2:
+        for i in range(u.shape[0]):
+            for j in range(u.shape[1]):
+                _biharmonic_to_ortho_1D(u[i, j], w[i, j], a, b)
+
+def chebyshev_inverse_mass(array, axis, scale, last_scale):
+    n = array.ndim
+    if n == 1:
+        _chebyshev_inverse_mass_1D(array, scale, last_scale)
+    elif n == 2:
+        _chebyshev_inverse_mass_2D(array, axis, scale, last_scale)
+    elif n == 3:
+        _chebyshev_inverse_mass_3D(array, axis, scale, last_scale)
+    else:
+        j = 1 if axis == 0 else 0
+        sl = [slice(None)]*n
+        for i in range(array.shape[j]):
+            sl[j] = i
+            chebyshev_inverse_mass(array[tuple(sl)], axis-1 if axis > j else axis,
+                                   scale, last_scale)
+    return array
+
+@jit(nopython=True, fastmath=True, cache=True)
+def _inverse_mass_scale(k, N, scale, last_scale):
+    if k == 0:
+        return scale*0.5
+    if k == N-1:
+        return scale*last_scale
+    return scale
+
+@jit(nopython=True, fastmath=True, cache=True)
+def _chebyshev_inverse_mass_1D(u, scale, last_scale):
+    N = u.shape[0]
+    for k in range(N):
+        u[k] *= _inverse_mass_scale(k, N, scale, last_scale)
+
+@jit(nopython=True, fastmath=True, cache=True)
+def _chebyshev_inverse_mass_2D(u, axis, scale, last_scale):
+    if axis == 0:
+        N = u.shape[0]
+        for k in range(N):
+            c = _inverse_mass_scale(k, N, scale, last_scale)
+            for j in range(u.shape[1]):
+                u[k, j] *= c
+    elif axis == 1:
+        for i in range(u.shape[0]):
+            _chebyshev_inverse_mass_1D(u[i], scale, last_scale)
+
+@jit(nopython=True, fastmath=True, cache=True)
+def _chebyshev_inverse_mass_3D(u, axis, scale, last_scale):
+    if axis == 0:
+        N = u.shape[0]
+        for k in range(N):
+            c = _inverse_mass_scale(k, N, scale, last_scale)
+            for j in range(u.shape[1]):
+                for l in range(u.shape[2]):
+                    u[k, j, l] *= c
+    elif axis == 1:
+        N = u.shape[1]
+        for i in range(u.shape[0]):
+            for k in range(N):
+                c = _inverse_mass_scale(k, N, scale, last_scale)
+                for l in range(u.shape[2]):
+                    u[i, k, l] *= c
+    elif axis == 2:
+        for i in range(u.shape[0]):
+            for j in range(u.shape[1]):
+                _chebyshev_inverse_mass_1D(u[i, j], scale, last_scale)
+
+def CTT_matvec(v, b, axis):
+    n = v.ndim
+    if n == 1:
+        _CTT_matvec_1D(v, b)
+    elif n == 2:
+        _CTT_matvec_2D(v, b, axis)
+    elif n == 3:
+        _CTT_matvec_3D(v, b, axis)
+    else:
+        j = 1 if axis == 0 else 0
+        sl = [slice(None)]*n
+        for i in range(v.shape[j]):
+            sl[j] = i
+            CTT_matvec(v[tuple(sl)], b[tuple(sl)], axis-1 if axis > j else axis)
+    return b
+
+@jit(nopython=True, fastmath=True, cache=True)
+def _CTT_matvec_1D(v, b):
+    N = v.shape[0]
+    s = np.zeros(2, dtype=v.dtype)
+    b[N-1] = 0
+    for k in range(N-2, -1, -1):
+        s[k % 2] += (k+1)*v[k+1]
+        b[k] = np.pi*s[k % 2]
+
+@jit(nopython=True, fastmath=True, cache=True)
+def _CTT_matvec_2D(v, b, axis):
+    if axis == 0:
+        N = v.shape[0]
+        s = np.zeros((2, v.shape[1]), dtype=v.dtype)
+        for j in range(v.shape[1]):
+            b[N-1, j] = 0
+        for k in range(N-2, -1, -1):
+            for j in range(v.shape[1]):
+                s[k % 2, j] += (k+1)*v[k+1, j]
+                b[k, j] = np.pi*s[k % 2, j]
+    elif axis == 1:
+        for i in range(v.shape[0]):
+            _CTT_matvec_1D(v[i], b[i])
+
+@jit(nopython=True, fastmath=True, cache=True)
+def _CTT_matvec_3D(v, b, axis):
+    if axis == 0:
+        N = v.shape[0]
+        s = np.zeros((2, v.shape[1], v.shape[2]), dtype=v.dtype)
+        for j in range(v.shape[1]):
+            for l in range(v.shape[2]):
+                b[N-1, j, l] = 0
+        for k in range(N-2, -1, -1):
+            for j in range(v.shape[1]):
+                for l in range(v.shape[2]):
+                    s[k % 2, j, l] += (k+1)*v[k+1, j, l]
+                    b[k, j, l] = np.pi*s[k % 2, j, l]
+    elif axis == 1:
+        for i in range(v.shape[0]):
+            _CTT_matvec_2D(v[i], b[i], 0)
+    elif axis == 2:
+        for i in range(v.shape[0]):
+            for j in range(v.shape[1]):
+                _CTT_matvec_1D(v[i, j], b[i, j])
+
+@jit(nopython=True, fastmath=True, cache=True)
+def biharmonic_composite(V, P, a, b):
+    Na = a.shape[0]
+    Nb = b.shape[0]
+    for i in range(V.shape[0]):
+        for j in range(V.shape[1]):
+            p = V[i, j]
+            if j < Na:
+                p += a[j]*V[i, j+2]
+            if j < Nb:
+                p += b[j]*V[i, j+4]
+            P[i, j] = p
+    return P
+
+def biharmonic_scalar_product(array, a, b, axis):
+    n = array.ndim
+    if n == 1:
+        _biharmonic_scalar_product_1D(array, a, b)
+    elif n == 2:
+        _biharmonic_scalar_product_2D(array, a, b, axis)
+    elif n == 3:
+        _biharmonic_scalar_product_3D(array, a, b, axis)
+    else:
+        j = 1 if axis == 0 else 0
+        sl = [slice(None)]*n
+        for i in range(array.shape[j]):
+            sl[j] = i
+            biharmonic_scalar_product(array[tuple(sl)], a, b,
+                                      axis-1 if axis > j else axis)
+    return array
+
+# Sweep in increasing k, such that w[k+2] and w[k+4] are read before
+# they are overwritten. No copy of the input is then required.
+
+@jit(nopython=True, fastmath=True, cache=True)
+def _biharmonic_scalar_product_1D(w, a, b):
+    for k in range(a.shape[0]):
+        w[k] += a[k]*w[k+2] + b[k]*w[k+4]
+
+@jit(nopython=True, fastmath=True, cache=True)
+def _biharmonic_scalar_product_2D(w, a, b, axis):
+    if axis == 0:
+        for k in range(a.shape[0]):
+            for j in range(w.shape[1]):
+                w[k, j] += a[k]*w[k+2, j] + b[k]*w[k+4, j]
+    elif axis == 1:
+        for i in range(w.shape[0]):
+            _biharmonic_scalar_product_1D(w[i], a, b)
+
+@jit(nopython=True, fastmath=True, cache=True)
+def _biharmonic_scalar_product_3D(w, a, b, axis):
+    if axis == 0:
+        for k in range(a.shape[0]):
+            for j in range(w.shape[1]):
+                for l in range(w.shape[2]):
+                    w[k, j, l] += a[k]*w[k+2, j, l] + b[k]*w[k+4, j, l]
+    elif axis == 1:
+        for i in range(w.shape[0]):
+            for k in range(a.shape[0]):
+                for l in range(w.shape[2]):
+                    w[i, k, l] += a[k]*w[i, k+2, l] + b[k]*w[i, k+4, l]
+    elif axis == 2:
+        for i in range(w.shape[0]):
+            for j in range(w.shape[1]):
+                _biharmonic_scalar_product_1D(w[i, j], a, b)
@@ -1416,6 +1416,7 @@ def getCompositeBase(Orthogonal):
         def __init__(self, *args, **kwargs):
             bc = kwargs.pop('bc', None)
             scaled = kwargs.pop('scaled', None)
+            self._to_ortho_terms = {}
             Orthogonal.__init__(self, *args, **kwargs)
             if bc is not None:
                 from shenfun.tensorproductspace import BoundaryValues
@@ -1612,21 +1613,34 @@ def getCompositeBase(Orthogonal):
                 output_array = np.zeros_like(input_array)
             else:
                 output_array.fill(0)
-            s = [np.newaxis]*self.dimensions
-            for key, val in self.stencil_matrix().items():
-                M = self.N if key >= 0 else self.dim()
-                s0 = slice(max(0, -key), min(self.dim(), M-max(0, key)))
-                Q = s0.stop-s0.start
-                s1 = slice(max(0, key), max(0, key)+Q)
-                s[self.axis] = slice(0, Q)
-                if isinstance(val, Number):
-                    output_array[self.sl[s1]] += val*input_array[self.sl[s0]]
-                else:
-                    output_array[self.sl[s1]] += val[tuple(s)]*input_array[self.sl[s0]]
+            for s1, s0, val in self._get_to_ortho_terms():
+                output_array[s1] += val*input_array[s0]
             if self.has_nonhomogeneous_bcs:
                 self.bc._add_to_orthogonal(output_array, input_array)
             return output_array
 
+        def _get_to_ortho_terms(self):
+            """Return list of (output slice, input slice, diagonal) for each
+            diagonal of the stencil matrix, with the diagonals shaped for
+            broadcasting along self.axis
+            """
+            key = (self.dimensions, self.axis)
+            terms = self._to_ortho_terms.get(key)
+            if terms is None:
+                terms = []
+                s = [np.newaxis]*self.dimensions
+                for k, val in self.stencil_matrix().items():
+                    M = self.N if k >= 0 else self.dim()
+                    s0 = slice(max(0, -k), min(self.dim(), M-max(0, k)))
+                    Q = s0.stop-s0.start
+                    s1 = slice(max(0, k), max(0, k)+Q)
+                    s[self.axis] = slice(0, Q)
+                    if not isinstance(val, Number):
+                        val = np.ascontiguousarray(val[tuple(s)])
+                    terms.append((self.sl[s1], self.sl[s0], val))
+                self._to_ortho_terms[key] = terms
+            return terms
+
         def evaluate_basis(self, x, i=0, output_array=None):
             x = np.atleast_1d(x)
             if output_array is None:
@@ -1661,7 +1675,6 @@ def getCompositeBase(Orthogonal):
             x = np.atleast_1d(x)
             if output_array is None:
                 output_array = np.zeros(x.shape, dtype=self.dtype)
-            x = self.map_reference_domain(x)
             w = self.to_ortho(u)
             output_array = Orthogonal.eval(self, x, w, output_array)
             return output_array
@@ -2319,42 +2332,41 @@ class FuncWrap:
     __slots__ = ('__doc__', '_func', '_input_array', '_output_array')
 
     def __init__(self, func, input_array, output_array):
-        object.__setattr__(self, '_func', func)
-        object.__setattr__(self, '_input_array', input_array)
-        object.__setattr__(self, '_output_array', output_array)
-        object.__setattr__(self, '__doc__', func.__doc__)
+        self._func = func
+        self._input_array = input_array
+        self._output_array = output_array
+        self.__doc__ = func.__doc__
 
     @property
     def input_array(self):
-        return object.__getattribute__(self, '_input_array')
+        return self._input_array
 
     @property
     def output_array(self):
-        return object.__getattribute__(self, '_output_array')
+        return self._output_array
 
     @property
     def func(self):
-        return object.__getattribute__(self, '_func')
+        return self._func
 
     def __call__(self, input_array=None, output_array=None, **kw):
-        return self.func(input_array, output_array, **kw)
+        return self._func(input_array, output_array, **kw)
 
 class Transform(FuncWrap):
 
     # pylint: disable=too-few-public-methods
 
-    __slots__ = ('_xfftn', '_input_array', '_output_array',
-                 '_tmp_array', '__doc__')
+    __slots__ = ('__doc__', '_xfftn', '_tmp_array')
 
     def __init__(self, func, xfftn, input_array, tmp_array, output_array):
         FuncWrap.__init__(self, func, input_array, output_array)
-        object.__setattr__(self, '_xfftn', xfftn)
-        object.__setattr__(self, '_tmp_array', tmp_array)
+        self._xfftn = xfftn
+        self._tmp_array = tmp_array
 
     @property
     def tmp_array(self):
-        return object.__getattribute__(self, '_tmp_array')
+        return self._tmp_array
 
     @property
     def xfftn(self):
-        return object.__getattribute__(self, '_xfftn')
+        return self._xfftn
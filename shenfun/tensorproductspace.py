@@ -2079,12 +2079,13 @@ class BoundaryValues:
 
         """
         M = self.bc.num_bcs()
-        if final is True:
-            for i in range(M):
-                u[self.base.si[-(M)+i]] = self.bcs_final[i]
+        bcs = self.bcs_final if final is True else self.bcs
+        if M > 0 and all(isinstance(b, Number) and b == 0 for b in bcs):
+            # Homogeneous, so zero all boundary dofs in one store
+            u[self.base.sl[slice(-M, None)]] = 0
         else:
             for i in range(M):
-                u[self.base.si[-(M)+i]] = self.bcs[i]
+                u[self.base.si[-(M)+i]] = bcs[i]
 
     def has_nonhomogeneous_bcs(self):
         for bc in self.bc.orderedvals():
@@ -10,6 +10,7 @@ from collections import defaultdict
 import numpy as np
 import sympy as sp
 from scipy.fftpack import dct
+from mpi4py_fft import fftw
 from shenfun.optimization import runtimeoptimizer
 from shenfun.optimization.cython import Lambda
 from shenfun.config import config
@@ -80,6 +81,9 @@ def clenshaw_curtis1D(u, quad="GC"):  # pragma: no cover
 class CachedArrayDict(MutableMapping):
     """Dictionary for caching Numpy arrays (work arrays)
 
+    The arrays are allocated byte-aligned, like the arrays used by the
+    planned FFTW transforms.
+
     Example
     -------
 
@@ -105,7 +109,10 @@ class CachedArrayDict(MutableMapping):
             value = self._data[newkey]
         except KeyError:
             shape, dtype, _ = newkey
-            value = np.empty(shape, dtype=np.dtype(dtype, align=True))
+            if len(shape) > 0:
+                value = fftw.aligned(shape, dtype=dtype)
+            else:
+                value = np.empty(shape, dtype=dtype)
             self._data[newkey] = value
         if fill:
             value.fill(0)
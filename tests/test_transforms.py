@@ -152,6 +152,17 @@ def test_eval(ST, quad):
     f = ST.eval(points, fk)
     assert np.allclose(fj, f, rtol=1e-5, atol=1e-6), np.linalg.norm(fj-f)
 
+@pytest.mark.parametrize('ST', (cbases.ShenDirichlet, cbases.ShenNeumann,
+                                cbases.ShenBiharmonic, lbases.ShenDirichlet))
+def test_eval_domain(ST):
+    """Test eval of composite space on non-reference domain"""
+    ST = ST(N, domain=(0, 2))
+    fk = shenfun.Function(ST)
+    fk[:4] = 1
+    f = ST.eval(ST.mesh(), fk)
+    fj = fk.backward()
+    assert np.allclose(fj, f)
+
 @pytest.mark.parametrize('basis, quad', cl_nonortho)
 #@pytest.mark.xfail(raises=AssertionError)
 def test_to_ortho(basis, quad):
@@ -294,6 +305,64 @@ def test_transforms(ST, quad):
     T.destroy()
 
 
+@pytest.mark.parametrize('quad', cquads)
+@pytest.mark.parametrize('dtype', ('d', 'D'))
+def test_shared_dct_plan(quad, dtype):
+    N = 12
+    C0 = cbases.Orthogonal(N, quad=quad, dtype=dtype)
+    C1 = cbases.Orthogonal(N, quad=quad, dtype=dtype)
+    assert C0.forward.xfftn.func is C1.forward.xfftn.func
+    assert C0.forward.output_array is not C1.forward.output_array
+    fj = np.random.random(N)
+    if dtype == 'D':
+        fj = fj + 1j*np.random.random(N)
+    f0 = C0.forward(fj).copy()
+    f1 = C1.forward(2*fj)
+    assert np.allclose(2*f0, f1)
+    assert np.allclose(C0.forward.output_array, f0)
+    assert np.allclose(C1.backward(f1), 2*fj)
+
+def test_shared_dlt_plan():
+    N = 12
+    L0 = lbases.Orthogonal(N, dtype='D')
+    L1 = lbases.Orthogonal(N, dtype='D')
+    assert L0.forward.xfftn.func is L1.forward.xfftn.func
+    assert L0.backward.xfftn.func is L1.backward.xfftn.func
+    assert L0.forward.output_array is not L1.forward.output_array
+    fj = np.random.random(N) + 1j*np.random.random(N)
+    f0 = L0.forward(fj, kind='fast').copy()
+    f1 = L1.forward(2*fj, kind='fast')
+    assert np.allclose(2*f0, f1)
+    assert np.allclose(L0.forward.output_array, f0)
+    assert np.allclose(L1.backward(f1, kind='fast'), 2*fj)
+    assert np.allclose(L0.forward.output_array, f0)
+
+@pytest.mark.parametrize('shape,axis', (((12,), 0), ((12, 5), 0), ((5, 12), 1),
+                                        ((12, 4, 3), 0), ((3, 12, 4), 1),
+                                        ((3, 4, 12), 2), ((2, 3, 12, 4), 2)))
+def test_numba_chebyshev_kernels(shape, axis):
+    pytest.importorskip('numba')
+    N = shape[axis]
+    M = N-4
+    a, b = np.random.random(M), np.random.random(M)
+    u = np.random.random(shape) + 1j*np.random.random(shape)
+    V = np.polynomial.chebyshev.chebvander(np.cos(np.arange(7)), N-1)
+    mode = config['optimization']['mode']
+    config['optimization']['mode'] = 'numba'
+    try:
+        f = cbases.biharmonic_to_ortho
+        assert np.allclose(f(u, np.zeros_like(u), a, b, axis),
+                           f.func(u, np.zeros_like(u), a, b, axis))
+        for f, args in ((cbases.biharmonic_scalar_product, (a, b, axis)),
+                        (cbases.chebyshev_inverse_mass, (axis, 0.3, 0.5))):
+            assert np.allclose(f(u.copy(), *args), f.func(u.copy(), *args))
+        a2 = np.random.random(N-2)
+        P0 = cbases.biharmonic_composite(V, np.zeros_like(V), a2, b)
+        assert np.allclose(P0, cbases.biharmonic_composite.func(V, np.zeros_like(V), a2, b))
+        assert np.allclose(cbases.chebvanderder(V, 2), cbases.chebvanderder.func(V, 2))
+    finally:
+        config['optimization']['mode'] = mode
+
 @pytest.mark.parametrize('ST,quad', all_trial_bases_and_quads)
 @pytest.mark.parametrize('axis', (0, 1, 2))
 def test_axis(ST, quad, axis):